@@ -0,0 +1,78 @@
+"""
+Cache Helper Functions
+
+Redis-backed response cache for the read-heavy catalog endpoints.
+Caching is skipped entirely when REDIS_URL is not set, so the API keeps
+working against MongoDB alone.
+"""
+
+import os
+import logging
+from functools import wraps
+from dotenv import load_dotenv
+from fastapi import Response
+from responses import dumps
+import orjson
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+redis = None
+
+redis_url = os.getenv("REDIS_URL")
+
+if redis_url:
+    from redis.asyncio import Redis
+    # Short timeouts so an unreachable Redis falls back to MongoDB quickly
+    redis = Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+
+def cache_key(prefix: str, **params) -> str:
+    """Build a stable cache key from an endpoint prefix and its parameters"""
+    # JSON keeps values quoted and escaped, so no two parameter sets share a key
+    return f"{prefix}:" + orjson.dumps(params, option=orjson.OPT_SORT_KEYS).decode()
+
+
+def cached(prefix: str, ttl: int = 60):
+    """Cache the JSON body of an endpoint in Redis for `ttl` seconds"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(**kwargs):
+            if redis is None:
+                return await func(**kwargs)
+
+            key = cache_key(prefix, **kwargs)
+            try:
+                hit = await redis.get(key)
+            except Exception as e:
+                logger.warning("Cache read failed for %s: %s", key, e)
+                hit = None
+            if hit is not None:
+                return Response(content=hit, media_type="application/json")
+
+            result = await func(**kwargs)
+            payload = result.body if isinstance(result, Response) else dumps(result)
+            try:
+                await redis.setex(key, ttl, payload)
+            except Exception as e:
+                logger.warning("Cache write failed for %s: %s", key, e)
+            return Response(content=payload, media_type="application/json")
+        return wrapper
+    return decorator
+
+
+async def invalidate(*keys: str):
+    """Drop cached entries; a key ending in '*' drops every match"""
+    if redis is None:
+        return
+    try:
+        for key in keys:
+            if key.endswith("*"):
+                async for match in redis.scan_iter(match=key):
+                    await redis.delete(match)
+            else:
+                await redis.delete(key)
+    except Exception as e:
+        logger.warning("Cache invalidation failed for %s: %s", keys, e)
@@ -1,28 +1,111 @@
 import os
-from fastapi import FastAPI, HTTPException
+import sys
+import time
+import logging
+from functools import lru_cache
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
-from database import db, create_document, get_documents
-from schemas import Course, Lesson, Enrollment, Review
+from fastapi.responses import Response
+from typing import Optional
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from database import db, create_document, create_documents, get_documents, aggregate_documents
+from cache import cached, cache_key, invalidate
+from responses import MongoJSONResponse
+from schemas import Course, Lesson, Enrollment, Review, COURSE_ADAPTER, LESSON_ADAPTER, ENROLLMENT_ADAPTER, REVIEW_ADAPTER
 
-app = FastAPI(title="E-Learning API", version="1.0.0")
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def _oid(value: str) -> ObjectId:
+    """Parse an id string once; raises InvalidId for malformed input"""
+    return ObjectId(value)
+
+
+def _json_body(model: type[BaseModel]) -> dict:
+    """OpenAPI request body for handlers that parse the raw body themselves"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
+
+
+async def _parse_body(request: Request, adapter: TypeAdapter):
+    """Validate the raw JSON body in one pass, reporting errors like FastAPI does"""
+    raw = await request.body()
+    if not raw:
+        raise RequestValidationError([{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}])
+    try:
+        return adapter.validate_json(raw)
+    except ValidationError as e:
+        # Error inputs carry the raw bytes, which FastAPI's 422 handler can only encode as UTF-8
+        try:
+            raw.decode()
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="There was an error parsing the body")
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        )
+
+
+app = FastAPI(title="E-Learning API", version="1.0.0", default_response_class=MongoJSONResponse)
+
+# Comma-separated frontend origins, e.g. "https://app.example.com".
+# Cross-origin requests are refused until this is set; "*" is for local development only.
+cors_origins = [o.strip() for o in os.getenv("CORS_ORIGINS", "").split(",") if o.strip()]
+if not cors_origins:
+    logger.warning("CORS_ORIGINS is not set; cross-origin requests will be rejected")
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
 )
 
 
+@app.on_event("startup")
+async def ensure_indexes():
+    """Create the indexes the catalog queries rely on"""
+    if db is None:
+        return
+    indexes = [
+        # Course.language is free-form, so keep MongoDB from reading it as the
+        # stemmer language; nothing writes text_language
+        ("course", [("title", "text"), ("subtitle", "text"), ("description", "text"), ("tags", "text")],
+         {"language_override": "text_language"}),
+        ("course", "tags", {}),
+        ("lesson", [("course_id", 1), ("order", 1)], {}),
+    ]
+    for collection_name, keys, options in indexes:
+        # Index problems must not stop the API from starting
+        try:
+            await db[collection_name].create_index(keys, **options)
+        except Exception as e:
+            logger.warning("Could not create index %s on %s: %s", keys, collection_name, e)
+
+
 @app.get("/")
 def read_root():
     return {"message": "E-Learning Backend Running"}
 
 
+_HEALTH_CACHE = {"t": 0.0, "data": None}
+_HEALTH_TTL = 5
+
+
 @app.get("/test")
-def test_database():
+async def test_database():
+    if _HEALTH_CACHE["data"] is not None and time.monotonic() - _HEALTH_CACHE["t"] < _HEALTH_TTL:
+        return _HEALTH_CACHE["data"]
+
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -39,7 +122,7 @@ def test_database():
             response["database_name"] = db.name if hasattr(db, 'name') else "✅ Connected"
             response["connection_status"] = "Connected"
             try:
-                collections = db.list_collection_names()
+                collections = await db.list_collection_names()
                 response["collections"] = collections[:10]
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
@@ -49,6 +132,8 @@ def test_database():
     except Exception as e:
         response["database"] = f"❌ Error: {str(e)[:80]}"
 
+    _HEALTH_CACHE["t"] = time.monotonic()
+    _HEALTH_CACHE["data"] = response
     return response
 
 
@@ -56,44 +141,96 @@ def test_database():
 # Course Catalog Endpoints
 # -----------------------------
 
-@app.post("/api/courses", response_model=dict)
-async def create_course(course: Course):
+@app.post("/api/courses", openapi_extra=_json_body(Course))
+async def create_course(request: Request):
+    course = await _parse_body(request, COURSE_ADAPTER)
     try:
-        course_id = create_document("course", course)
+        course_id = await create_document("course", course)
+        await invalidate("courses:*")
         return {"id": course_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/courses", response_model=List[dict])
-async def list_courses(tag: Optional[str] = None, q: Optional[str] = None, limit: int = 50):
+@app.get("/api/courses")
+@cached("courses")
+async def list_courses(tag: Optional[str] = None, q: Optional[str] = None, limit: int = 50) -> Response:
     try:
         filter_dict = {}
+        projection = {"description": 0}
+        sort = None
         if tag:
-            filter_dict["tags"] = {"$in": [tag]}
+            filter_dict["tags"] = tag
         if q:
-            filter_dict["$or"] = [
-                {"title": {"$regex": q, "$options": "i"}},
-                {"subtitle": {"$regex": q, "$options": "i"}},
-                {"description": {"$regex": q, "$options": "i"}},
-                {"tags": {"$regex": q, "$options": "i"}},
-            ]
-        courses = get_documents("course", filter_dict, limit)
-        return courses
+            filter_dict["$text"] = {"$search": q}
+            # Rank text matches by relevance
+            projection["score"] = {"$meta": "textScore"}
+            sort = [("score", {"$meta": "textScore"})]
+        elif not tag:
+            # The unfiltered catalog is listed newest first, walked straight off the _id index
+            sort = [("_id", -1)]
+        courses = await get_documents("course", filter_dict, limit, sort=sort, projection=projection)
+        return MongoJSONResponse(content=courses)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/courses/{course_id}", response_model=dict)
-async def get_course(course_id: str):
+@app.get("/api/courses/{course_id}")
+@cached("course")
+async def get_course(course_id: str) -> Response:
     try:
-        from bson import ObjectId
-        if not ObjectId.is_valid(course_id):
+        try:
+            oid = _oid(course_id)
+        except (InvalidId, TypeError):
             raise HTTPException(status_code=400, detail="Invalid course ID")
-        docs = get_documents("course", {"_id": ObjectId(course_id)}, limit=1)
+        docs = await get_documents("course", {"_id": oid}, limit=1)
         if not docs:
             raise HTTPException(status_code=404, detail="Course not found")
-        return docs[0]
+        return MongoJSONResponse(content=docs[0])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _course_id_param(course_id: str) -> str:
+    """Lowercase the id so mixed-case spellings of one course share a cache entry"""
+    return course_id.lower()
+
+
+@app.get("/api/courses/{course_id}/detail")
+@cached("course_detail")
+async def get_course_detail(course_id: str = Depends(_course_id_param)) -> Response:
+    """Course, lesson list and reviews for the detail page in one query"""
+    try:
+        try:
+            oid = _oid(course_id)
+        except (InvalidId, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid course ID")
+        docs = await aggregate_documents("course", [
+            {"$match": {"_id": oid}},
+            {"$lookup": {
+                "from": "lesson",
+                "pipeline": [
+                    {"$match": {"course_id": str(oid)}},
+                    {"$sort": {"order": 1}},
+                    {"$limit": 200},
+                    {"$project": {"content": 0}},
+                ],
+                "as": "lessons",
+            }},
+            {"$lookup": {
+                "from": "review",
+                "pipeline": [{"$match": {"course_id": str(oid)}}, {"$limit": 200}],
+                "as": "reviews",
+            }},
+        ])
+        if not docs:
+            raise HTTPException(status_code=404, detail="Course not found")
+        course = docs[0]
+        lessons = course.pop("lessons")
+        reviews = course.pop("reviews")
+        return MongoJSONResponse(content={"course": course, "lessons": lessons, "reviews": reviews})
     except HTTPException:
         raise
     except Exception as e:
@@ -104,21 +241,45 @@ async def get_course(course_id: str):
 # Lessons
 # -----------------------------
 
-@app.post("/api/lessons", response_model=dict)
-async def create_lesson(lesson: Lesson):
+@app.post("/api/lessons", openapi_extra=_json_body(Lesson))
+async def create_lesson(request: Request):
+    lesson = await _parse_body(request, LESSON_ADAPTER)
     try:
-        lesson_id = create_document("lesson", lesson)
+        lesson_id = await create_document("lesson", lesson)
+        await invalidate(
+            cache_key("lessons", course_id=lesson.course_id),
+            cache_key("course_detail", course_id=lesson.course_id),
+        )
         return {"id": lesson_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/courses/{course_id}/lessons", response_model=List[dict])
-async def list_lessons(course_id: str):
+@app.get("/api/courses/{course_id}/lessons")
+@cached("lessons")
+async def list_lessons(course_id: str) -> Response:
+    try:
+        lessons = await get_documents(
+            "lesson", {"course_id": course_id}, limit=200, sort=[("order", 1)], projection={"content": 0}
+        )
+        return MongoJSONResponse(content=lessons)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/lessons/{lesson_id}")
+async def get_lesson(lesson_id: str) -> Response:
     try:
-        lessons = get_documents("lesson", {"course_id": course_id}, limit=200)
-        lessons = sorted(lessons, key=lambda x: x.get("order", 0))
-        return lessons
+        try:
+            oid = _oid(lesson_id)
+        except (InvalidId, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid lesson ID")
+        docs = await get_documents("lesson", {"_id": oid}, limit=1)
+        if not docs:
+            raise HTTPException(status_code=404, detail="Lesson not found")
+        return MongoJSONResponse(content=docs[0])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -127,20 +288,23 @@ async def list_lessons(course_id: str):
 # Enrollment
 # -----------------------------
 
-@app.post("/api/enroll", response_model=dict)
-async def enroll(enrollment: Enrollment):
+@app.post("/api/enroll", openapi_extra=_json_body(Enrollment))
+async def enroll(request: Request):
+    enrollment = await _parse_body(request, ENROLLMENT_ADAPTER)
     try:
-        en_id = create_document("enrollment", enrollment)
+        en_id = await create_document("enrollment", enrollment)
+        await invalidate(cache_key("enrollments", course_id=enrollment.course_id))
         return {"id": en_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/courses/{course_id}/enrollments", response_model=List[dict])
-async def list_enrollments(course_id: str):
+@app.get("/api/courses/{course_id}/enrollments")
+@cached("enrollments")
+async def list_enrollments(course_id: str) -> Response:
     try:
-        docs = get_documents("enrollment", {"course_id": course_id}, limit=500)
-        return docs
+        docs = await get_documents("enrollment", {"course_id": course_id}, limit=500)
+        return MongoJSONResponse(content=docs)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -149,20 +313,26 @@ async def list_enrollments(course_id: str):
 # Reviews
 # -----------------------------
 
-@app.post("/api/reviews", response_model=dict)
-async def create_review(review: Review):
+@app.post("/api/reviews", openapi_extra=_json_body(Review))
+async def create_review(request: Request):
+    review = await _parse_body(request, REVIEW_ADAPTER)
     try:
-        rev_id = create_document("review", review)
+        rev_id = await create_document("review", review)
+        await invalidate(
+            cache_key("reviews", course_id=review.course_id),
+            cache_key("course_detail", course_id=review.course_id),
+        )
         return {"id": rev_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/courses/{course_id}/reviews", response_model=List[dict])
-async def list_reviews(course_id: str):
+@app.get("/api/courses/{course_id}/reviews")
+@cached("reviews")
+async def list_reviews(course_id: str) -> Response:
     try:
-        docs = get_documents("review", {"course_id": course_id}, limit=200)
-        return docs
+        docs = await get_documents("review", {"course_id": course_id}, limit=200)
+        return MongoJSONResponse(content=docs)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -171,67 +341,67 @@ async def list_reviews(course_id: str):
 # Seed Demo Content (for quick start)
 # -----------------------------
 
+# Validated once at import; seed_demo only inserts copies of these dicts
+_DEMO_COURSES_DUMP: list[dict] = [c.model_dump() for c in [
+    Course(
+        title="React for Beginners",
+        subtitle="Build dynamic UIs with hooks",
+        description="Learn the fundamentals of React, components, hooks, and state management by building hands-on projects.",
+        instructor_name="Alex Johnson",
+        instructor_email="alex@example.com",
+        price=19.99,
+        thumbnail_url="https://images.unsplash.com/photo-1526378722484-bd91ca387e72?w=800&q=80&auto=format&fit=crop",
+        tags=["react", "frontend", "javascript"],
+        level="Beginner"
+    ),
+    Course(
+        title="FastAPI Bootcamp",
+        subtitle="Modern APIs with Python",
+        description="Create high-performance APIs with FastAPI, Pydantic, and MongoDB. Includes deployment tips.",
+        instructor_name="Samantha Lee",
+        instructor_email="sam@example.com",
+        price=24.99,
+        thumbnail_url="https://images.unsplash.com/photo-1518779578993-ec3579fee39f?w=800&q=80&auto=format&fit=crop",
+        tags=["python", "api", "backend"],
+        level="Intermediate"
+    ),
+    Course(
+        title="Design Systems 101",
+        subtitle="Build cohesive UI libraries",
+        description="From typography to components, learn how to create maintainable design systems.",
+        instructor_name="Taylor Kim",
+        instructor_email="taylor@example.com",
+        price=0.0,
+        thumbnail_url="https://images.unsplash.com/photo-1529336953121-ad5a0d43d0d2?w=800&q=80&auto=format&fit=crop",
+        tags=["design", "ui", "ux"],
+        level="All Levels"
+    ),
+]]
+
+
 @app.post("/api/seed")
 async def seed_demo():
     try:
         # Only seed if there are no courses yet
-        existing = get_documents("course", {}, limit=1)
+        existing = await get_documents("course", {}, limit=1)
         if existing:
             return {"status": "ok", "message": "Courses already exist"}
 
-        demo_courses = [
-            Course(
-                title="React for Beginners",
-                subtitle="Build dynamic UIs with hooks",
-                description="Learn the fundamentals of React, components, hooks, and state management by building hands-on projects.",
-                instructor_name="Alex Johnson",
-                instructor_email="alex@example.com",
-                price=19.99,
-                thumbnail_url="https://images.unsplash.com/photo-1526378722484-bd91ca387e72?w=800&q=80&auto=format&fit=crop",
-                tags=["react", "frontend", "javascript"],
-                level="Beginner"
-            ),
-            Course(
-                title="FastAPI Bootcamp",
-                subtitle="Modern APIs with Python",
-                description="Create high-performance APIs with FastAPI, Pydantic, and MongoDB. Includes deployment tips.",
-                instructor_name="Samantha Lee",
-                instructor_email="sam@example.com",
-                price=24.99,
-                thumbnail_url="https://images.unsplash.com/photo-1518779578993-ec3579fee39f?w=800&q=80&auto=format&fit=crop",
-                tags=["python", "api", "backend"],
-                level="Intermediate"
-            ),
-            Course(
-                title="Design Systems 101",
-                subtitle="Build cohesive UI libraries",
-                description="From typography to components, learn how to create maintainable design systems.",
-                instructor_name="Taylor Kim",
-                instructor_email="taylor@example.com",
-                price=0.0,
-                thumbnail_url="https://images.unsplash.com/photo-1529336953121-ad5a0d43d0d2?w=800&q=80&auto=format&fit=crop",
-                tags=["design", "ui", "ux"],
-                level="All Levels"
-            ),
-        ]
-
-        created_ids = []
-        for idx, c in enumerate(demo_courses):
-            cid = create_document("course", c)
-            created_ids.append(cid)
-            # Create 3 demo lessons per course
-            for l_idx in range(1, 4):
-                create_document(
-                    "lesson",
-                    Lesson(
-                        course_id=cid,
-                        title=f"Lesson {l_idx}: Topic Overview",
-                        content=f"This is the content for lesson {l_idx}. You'll learn key concepts and apply them in a mini project.",
-                        video_url=None,
-                        order=l_idx,
-                    ),
-                )
-
+        created_ids = await create_documents("course", _DEMO_COURSES_DUMP)
+        # Create 3 demo lessons per course
+        await create_documents("lesson", [
+            Lesson(
+                course_id=cid,
+                title=f"Lesson {l_idx}: Topic Overview",
+                content=f"This is the content for lesson {l_idx}. You'll learn key concepts and apply them in a mini project.",
+                video_url=None,
+                order=l_idx,
+            )
+            for cid in created_ids
+            for l_idx in range(1, 4)
+        ])
+
+        await invalidate("courses:*", "lessons:*")
         return {"status": "ok", "created_courses": created_ids}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -240,4 +410,8 @@ async def seed_demo():
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WORKERS", 2))
+    # uvloop does not support Windows
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    # Multiple workers need the app as an import string
+    uvicorn.run("main:app", host="0.0.0.0", port=port, loop=loop, http="httptools", workers=workers)
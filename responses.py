@@ -0,0 +1,30 @@
+"""
+Response Helpers
+
+orjson-backed JSON encoding that understands MongoDB documents.
+Use `MongoJSONResponse` to return raw documents straight from the database.
+"""
+
+from typing import Any
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+import orjson
+
+
+def _json_default(obj):
+    """Encode ObjectIds as strings; anything else orjson rejects stays an error"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes"""
+    return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """ORJSONResponse that stringifies ObjectIds instead of failing on them"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
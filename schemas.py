@@ -12,12 +12,14 @@ Examples:
 - Review -> "review"
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional, List
 
 
 class User(BaseModel):
     """Basic user schema"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     name: str = Field(..., description="Full name")
     email: str = Field(..., description="Email address")
     avatar_url: Optional[str] = Field(None, description="Public avatar URL")
@@ -26,6 +28,8 @@ class User(BaseModel):
 
 class Course(BaseModel):
     """Courses collection schema"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     title: str = Field(..., description="Course title")
     subtitle: Optional[str] = Field(None, description="Short subtitle or tagline")
     description: str = Field(..., description="Full course description")
@@ -40,6 +44,8 @@ class Course(BaseModel):
 
 class Lesson(BaseModel):
     """Lessons collection schema"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     course_id: str = Field(..., description="ID of the parent course (stringified ObjectId)")
     title: str = Field(..., description="Lesson title")
     content: str = Field(..., description="Lesson content (markdown or text)")
@@ -49,6 +55,8 @@ class Lesson(BaseModel):
 
 class Enrollment(BaseModel):
     """Enrollments collection schema"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     course_id: str = Field(..., description="ID of the course (stringified ObjectId)")
     user_email: str = Field(..., description="Email of the enrolled user")
     user_name: str = Field(..., description="Name of the enrolled user")
@@ -57,8 +65,17 @@ class Enrollment(BaseModel):
 
 class Review(BaseModel):
     """Course reviews"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     course_id: str = Field(..., description="ID of the course (stringified ObjectId)")
     user_email: str = Field(..., description="Reviewer email")
     user_name: str = Field(..., description="Reviewer name")
     rating: int = Field(..., ge=1, le=5, description="Star rating 1-5")
     comment: Optional[str] = Field(None, description="Optional review text")
+
+
+# Validators are built once here and reused on every request.
+COURSE_ADAPTER = TypeAdapter(Course)
+LESSON_ADAPTER = TypeAdapter(Lesson)
+ENROLLMENT_ADAPTER = TypeAdapter(Enrollment)
+REVIEW_ADAPTER = TypeAdapter(Review)